@@ -0,0 +1,28 @@
+<?php
+
+namespace App\Console\Commands;
+
+use Illuminate\Console\Command;
+
+class ReloadTelegramBot extends Command
+{
+    protected $signature = 'telegram:reload';
+    protected $description = 'Ask the running Telegram bot supervisor for a rolling reload';
+
+    public function handle()
+    {
+        // Supervisor memeriksa file ini setiap loop, cara ini juga berjalan di Windows (tanpa SIGHUP)
+        $pidFile = config('services.telegram_bot.pid_file');
+        clearstatcache(true, $pidFile);
+        if (! is_file($pidFile) || time() - filemtime($pidFile) >= config('services.telegram_bot.stale_after')) {
+            $this->error('Telegram bot supervisor is not running.');
+
+            return 1;
+        }
+
+        touch(config('services.telegram_bot.reload_file'));
+        $this->info('Rolling reload requested.');
+
+        return 0;
+    }
+}
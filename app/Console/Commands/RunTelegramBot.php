@@ -3,16 +3,40 @@
 namespace App\Console\Commands;
 
 use Illuminate\Console\Command;
+use Illuminate\Support\Facades\Process;
 
 class RunTelegramBot extends Command
 {
-    protected $signature = 'telegram:run';
-    protected $description = 'Run Telegram bot Python script';
+    protected $signature = 'telegram:run
+                            {--workers=2 : Total bot worker processes (1 active, the rest are warm standbys)}
+                            {--health-timeout=60 : Seconds without a heartbeat before the active worker is restarted}
+                            {--python=python : Python executable used to run the supervisor}';
+    protected $description = 'Run the Telegram bot under the Python supervisor';
 
     public function handle()
     {
-        $pythonScript = base_path('telegram_bot.py');
-        exec("python {$pythonScript}");
+        // Supervisor menyentuh PID file setiap beberapa detik; jika masih baru, bot sudah berjalan
+        $pidFile = config('services.telegram_bot.pid_file');
+        clearstatcache(true, $pidFile);
+        if (is_file($pidFile) && time() - filemtime($pidFile) < config('services.telegram_bot.stale_after')) {
+            $this->info('Telegram bot supervisor is already running.');
+
+            return 0;
+        }
+
+        $supervisorScript = base_path('bot_supervisor.py');
+
+        $result = Process::forever()
+            ->path(base_path())
+            ->run([
+                $this->option('python'),
+                $supervisorScript,
+                '--workers='.(int) $this->option('workers'),
+                '--health-timeout='.(int) $this->option('health-timeout'),
+            ], function (string $type, string $output) {
+                $this->output->write($output);
+            });
+
+        return $result->exitCode();
     }
 }
-
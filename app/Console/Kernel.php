@@ -9,7 +9,9 @@ class Kernel extends ConsoleKernel
 {
     protected function schedule(Schedule $schedule)
     {
-        $schedule->command('telegram:run')->everyMinute();
+        // Cek liveness: telegram:run langsung selesai jika supervisor masih hidup
+        // (lihat PID file), dan menjalankan supervisor baru jika tidak
+        $schedule->command('telegram:run')->everyMinute()->runInBackground();
     }
 
     protected function commands()
@@ -0,0 +1,194 @@
+import os
+import pickle
+import sqlite3
+import logging
+from time import time
+from copy import deepcopy
+from collections import defaultdict
+from telegram.ext import BasePersistence, PicklePersistence, PersistenceInput
+
+# Lokasi default file state bot (storage/app sudah di-ignore oleh git)
+DEFAULT_PERSISTENCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'storage', 'app', 'telegram_bot_state.sqlite')
+
+# Batas jumlah entri per cache di bot_data supaya file state tidak terus membesar
+MAX_CACHE_ENTRIES = 500
+
+
+class SQLitePersistence(BasePersistence):
+    """
+    Persistence untuk python-telegram-bot yang menyimpan user_data, chat_data,
+    bot_data dan state conversation ke satu file SQLite lokal.
+
+    Data dibaca dari file hanya saat pertama kali diminta oleh Application
+    (lazy reload). Setiap update dari Application (tiap update_interval
+    detik dan saat bot berhenti) langsung di-commit ke file.
+    """
+
+    def __init__(self, filepath=DEFAULT_PERSISTENCE_PATH, store_data=None, update_interval=60):
+        super().__init__(store_data=store_data or PersistenceInput(callback_data=False), update_interval=update_interval)
+        self.filepath = filepath
+        self._conn = None
+        self.user_data = None
+        self.chat_data = None
+        self.bot_data = None
+        self.conversations = None
+
+    def _get_conn(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+            self._conn = sqlite3.connect(self.filepath)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value BLOB NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _load(self, namespace):
+        rows = self._get_conn().execute("SELECT key, value FROM state WHERE namespace = ?", (namespace,)).fetchall()
+        result = {}
+        for key, value in rows:
+            try:
+                result[key] = pickle.loads(value)
+            except Exception as e:
+                logging.warning(f"Skipping unreadable persisted entry {namespace}/{key}: {e}")
+        return result
+
+    # Setiap penulisan langsung di-commit agar state tetap ada walau proses dimatikan paksa
+    def _save(self, namespace, key, value):
+        with self._get_conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO state (namespace, key, value) VALUES (?, ?, ?)",
+                (namespace, str(key), pickle.dumps(value)),
+            )
+
+    def _delete(self, namespace, key):
+        with self._get_conn() as conn:
+            conn.execute("DELETE FROM state WHERE namespace = ? AND key = ?", (namespace, str(key)))
+
+    async def get_user_data(self):
+        if self.user_data is None:
+            self.user_data = {int(k): v for k, v in self._load('user_data').items()}
+        return deepcopy(self.user_data)
+
+    async def get_chat_data(self):
+        if self.chat_data is None:
+            self.chat_data = {int(k): v for k, v in self._load('chat_data').items()}
+        return deepcopy(self.chat_data)
+
+    async def get_bot_data(self):
+        if self.bot_data is None:
+            self.bot_data = self._load('bot_data').get('bot_data', {})
+        return deepcopy(self.bot_data)
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name):
+        if self.conversations is None:
+            self.conversations = defaultdict(dict, self._load('conversations'))
+        return self.conversations[name].copy()
+
+    async def update_conversation(self, name, key, new_state):
+        if self.conversations is None:
+            self.conversations = defaultdict(dict, self._load('conversations'))
+        if self.conversations[name].get(key) == new_state:
+            return
+        self.conversations[name][key] = new_state
+        self._save('conversations', name, self.conversations[name])
+
+    async def update_user_data(self, user_id, data):
+        if self.user_data is None:
+            self.user_data = {}
+        if self.user_data.get(user_id) == data:
+            return
+        self.user_data[user_id] = deepcopy(data)
+        self._save('user_data', user_id, data)
+
+    async def update_chat_data(self, chat_id, data):
+        if self.chat_data is None:
+            self.chat_data = {}
+        if self.chat_data.get(chat_id) == data:
+            return
+        self.chat_data[chat_id] = deepcopy(data)
+        self._save('chat_data', chat_id, data)
+
+    async def update_bot_data(self, data):
+        if self.bot_data == data:
+            return
+        self.bot_data = deepcopy(data)
+        self._save('bot_data', 'bot_data', data)
+
+    async def update_callback_data(self, data):
+        pass
+
+    async def drop_chat_data(self, chat_id):
+        if self.chat_data is not None:
+            self.chat_data.pop(chat_id, None)
+        self._delete('chat_data', chat_id)
+
+    async def drop_user_data(self, user_id):
+        if self.user_data is not None:
+            self.user_data.pop(user_id, None)
+        self._delete('user_data', user_id)
+
+    async def refresh_user_data(self, user_id, user_data):
+        pass
+
+    async def refresh_chat_data(self, chat_id, chat_data):
+        pass
+
+    async def refresh_bot_data(self, bot_data):
+        pass
+
+    async def flush(self):
+        # Data sudah di-commit per penulisan, di sini cukup menutup file
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def build_persistence():
+    """
+    Membuat backend persistence sesuai env BOT_PERSISTENCE (sqlite, pickle, none).
+    Default-nya sqlite di storage/app.
+    """
+    backend = os.getenv('BOT_PERSISTENCE', 'sqlite').lower()
+    filepath = os.getenv('BOT_PERSISTENCE_PATH')
+
+    if backend == 'none':
+        return None
+    if backend == 'pickle':
+        return PicklePersistence(filepath=filepath or os.path.splitext(DEFAULT_PERSISTENCE_PATH)[0] + '.pickle')
+    if backend != 'sqlite':
+        logging.warning(f"Unknown BOT_PERSISTENCE backend '{backend}', falling back to sqlite")
+    return SQLitePersistence(filepath=filepath or DEFAULT_PERSISTENCE_PATH)
+
+
+def cache_get(bot_data, cache_name, key, max_age=None):
+    """
+    Ambil nilai dari cache bernama di bot_data. Mengembalikan None jika tidak ada
+    atau umurnya lebih dari max_age detik.
+    """
+    entry = bot_data.get(cache_name, {}).get(key)
+    if entry is None:
+        return None
+    stored_at, value = entry
+    if max_age is not None and time() - stored_at > max_age:
+        return None
+    return value
+
+
+def cache_set(bot_data, cache_name, key, value):
+    """
+    Simpan nilai ke cache bernama di bot_data, membuang entri paling lama
+    jika jumlahnya melebihi MAX_CACHE_ENTRIES.
+    """
+    cache = bot_data.setdefault(cache_name, {})
+    cache.pop(key, None)
+    cache[key] = (time(), value)
+    while len(cache) > MAX_CACHE_ENTRIES:
+        cache.pop(next(iter(cache)))
@@ -0,0 +1,310 @@
+import os
+import sys
+import signal
+import logging
+import argparse
+import threading
+import subprocess
+from time import time, sleep
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Set up logging
+logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+logger = logging.getLogger('bot_supervisor')
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.path.join(BASE_DIR, 'storage', 'app')
+
+# PID file diperbarui oleh thread terpisah sebagai tanda supervisor masih hidup, juga
+# selama menunggu preload/backoff/stop; file reload dibuat oleh `php artisan telegram:reload`
+# (bisa juga SIGHUP di Linux). Batas stale yang sama dibaca artisan lewat config/services.php
+PID_FILE = os.path.join(STATE_DIR, 'bot_supervisor.pid')
+RELOAD_FILE = os.path.join(STATE_DIR, 'bot_supervisor.reload')
+SUPERVISOR_STALE_AFTER = int(os.getenv('BOT_SUPERVISOR_STALE_AFTER', 30))
+PID_REFRESH_INTERVAL = max(1, SUPERVISOR_STALE_AFTER // 6)
+
+# Interval pengecekan worker dan batas waktu (detik)
+CHECK_INTERVAL = 2
+PRELOAD_TIMEOUT = 120
+STARTUP_GRACE = 60
+STOP_TIMEOUT = 30
+KILL_TIMEOUT = 5
+STABLE_AFTER = 60
+
+# Backoff restart setelah crash: 1, 2, 4, ... sampai MAX_BACKOFF detik
+MIN_BACKOFF = 1
+MAX_BACKOFF = 60
+
+
+class Worker:
+    """
+    Satu proses telegram_bot. Proses langsung memuat stack analitik
+    (pandas, matplotlib, engine database) lalu menunggu perintah START
+    dari supervisor sebelum mulai polling Telegram.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.heartbeat_file = os.path.join(STATE_DIR, f'bot_worker_{index}.heartbeat')
+        if os.path.exists(self.heartbeat_file):
+            os.remove(self.heartbeat_file)
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--worker', self.heartbeat_file],
+            stdin=subprocess.PIPE,
+            cwd=BASE_DIR,
+        )
+        self.started_at = None
+        logger.info(f"Spawned worker {index} (pid {self.process.pid})")
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def is_ready(self):
+        # File heartbeat pertama kali ditulis setelah preload selesai
+        return os.path.exists(self.heartbeat_file)
+
+    def heartbeat_age(self):
+        try:
+            return time() - os.path.getmtime(self.heartbeat_file)
+        except OSError:
+            return float('inf')
+
+    def wait_ready(self, timeout=PRELOAD_TIMEOUT):
+        deadline = time() + timeout
+        while time() < deadline:
+            if self.is_ready():
+                return True
+            if not self.is_alive():
+                return False
+            sleep(0.2)
+        return False
+
+    def start(self):
+        self.process.stdin.write(b'START\n')
+        self.process.stdin.flush()
+        self.started_at = time()
+        logger.info(f"Worker {self.index} is now serving updates")
+
+    def stop(self, timeout=STOP_TIMEOUT):
+        # STOP lewat stdin membuat worker berhenti lewat shutdown PTB (termasuk flush
+        # persistence); terminate() di Windows adalah TerminateProcess yang tidak bersih
+        if self.is_alive():
+            try:
+                self.process.stdin.write(b'STOP\n')
+                self.process.stdin.flush()
+            except OSError:
+                pass
+            try:
+                self.process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                logger.warning(f"Worker {self.index} did not stop in {timeout}s, terminating it")
+                self.process.terminate()
+                try:
+                    self.process.wait(timeout=KILL_TIMEOUT)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+                    self.process.wait()
+        if os.path.exists(self.heartbeat_file):
+            os.remove(self.heartbeat_file)
+
+
+class Supervisor:
+    """
+    Menjalankan satu worker aktif dan beberapa worker cadangan yang sudah
+    di-preload. Telegram hanya mengizinkan satu proses getUpdates per token,
+    jadi cadangan dipakai untuk failover dan reload tanpa jeda cold start.
+    """
+
+    def __init__(self, workers=2, health_timeout=60):
+        self.size = max(1, workers)
+        self.health_timeout = health_timeout
+        self.active = None
+        self.standby = []
+        self.next_index = 0
+        self.restart_delay = MIN_BACKOFF
+        self.reload_requested = False
+        self.stopping = False
+        self.stopped = threading.Event()
+
+    def spawn(self):
+        worker = Worker(self.next_index)
+        self.next_index += 1
+        return worker
+
+    def request_reload(self, signum=None, frame=None):
+        logger.info("Rolling reload requested")
+        self.reload_requested = True
+
+    def request_stop(self, signum=None, frame=None):
+        logger.info("Shutdown requested")
+        self.stopping = True
+
+    def promote(self):
+        # Pakai cadangan yang sudah siap, kalau tidak ada buat worker baru
+        while self.standby:
+            worker = self.standby.pop(0)
+            if worker.is_alive() and worker.wait_ready():
+                break
+            worker.stop()
+        else:
+            worker = self.spawn()
+            if not worker.wait_ready():
+                logger.error(f"Worker {worker.index} failed to preload")
+                worker.stop()
+                return
+        worker.start()
+        self.active = worker
+
+    def fill_standby(self):
+        self.standby = [worker for worker in self.standby if worker.is_alive()]
+        while len(self.standby) < self.size - 1:
+            self.standby.append(self.spawn())
+
+    def handle_failure(self):
+        logger.info(f"Restarting in {self.restart_delay}s")
+        sleep(self.restart_delay)
+        self.restart_delay = min(self.restart_delay * 2, MAX_BACKOFF)
+        self.promote()
+
+    def check_active(self):
+        worker = self.active
+        if worker is None:
+            self.handle_failure()
+            return
+
+        if not worker.is_alive():
+            logger.error(f"Worker {worker.index} exited with code {worker.process.returncode}")
+            self.active = None
+            self.handle_failure()
+        elif time() - worker.started_at > STARTUP_GRACE and worker.heartbeat_age() > self.health_timeout:
+            logger.error(f"Worker {worker.index} missed its heartbeat for {worker.heartbeat_age():.0f}s")
+            worker.stop()
+            self.active = None
+            self.handle_failure()
+        elif time() - worker.started_at > STABLE_AFTER:
+            self.restart_delay = MIN_BACKOFF
+
+    def rolling_reload(self):
+        self.reload_requested = False
+
+        # Worker baru memuat kode terbaru dan harus siap sebelum yang lama dihentikan
+        new_worker = self.spawn()
+        if not new_worker.wait_ready():
+            logger.error(f"Reload aborted: worker {new_worker.index} failed to preload")
+            new_worker.stop()
+            return
+
+        if self.active is not None:
+            self.active.stop()
+        new_worker.start()
+        self.active = new_worker
+
+        # Cadangan lama masih memakai kode lama
+        for worker in self.standby:
+            worker.stop()
+        self.standby = []
+
+    def keep_pid_file_fresh(self):
+        while not self.stopped.wait(PID_REFRESH_INTERVAL):
+            try:
+                os.utime(PID_FILE, None)
+            except OSError as e:
+                logger.warning(f"Could not refresh {PID_FILE}: {e}")
+
+    def check_reload_file(self):
+        if os.path.exists(RELOAD_FILE):
+            os.remove(RELOAD_FILE)
+            self.request_reload()
+
+    def run(self):
+        if supervisor_running():
+            logger.error(f"Another supervisor is already running (see {PID_FILE})")
+            return 1
+
+        signal.signal(signal.SIGINT, self.request_stop)
+        signal.signal(signal.SIGTERM, self.request_stop)
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, self.request_reload)
+
+        os.makedirs(STATE_DIR, exist_ok=True)
+        if os.path.exists(RELOAD_FILE):
+            os.remove(RELOAD_FILE)
+        with open(PID_FILE, 'w') as f:
+            f.write(str(os.getpid()))
+        threading.Thread(target=self.keep_pid_file_fresh, daemon=True).start()
+
+        try:
+            self.promote()
+
+            while not self.stopping:
+                self.check_reload_file()
+                if self.reload_requested:
+                    self.rolling_reload()
+                self.check_active()
+                self.fill_standby()
+                sleep(CHECK_INTERVAL)
+
+            for worker in self.standby + [self.active]:
+                if worker is not None:
+                    worker.stop()
+            logger.info("All workers stopped")
+        finally:
+            self.stopped.set()
+            if os.path.exists(PID_FILE):
+                os.remove(PID_FILE)
+        return 0
+
+
+def supervisor_running():
+    """Supervisor dianggap hidup jika PID file-nya masih diperbarui dalam SUPERVISOR_STALE_AFTER detik."""
+    try:
+        return time() - os.path.getmtime(PID_FILE) < SUPERVISOR_STALE_AFTER
+    except OSError:
+        return False
+
+
+def run_worker(heartbeat_file):
+    """
+    Entry point proses worker: preload, tandai siap, tunggu START lalu
+    jalankan bot.
+    """
+    # Sinyal dari terminal ditangani supervisor; setelah START, run_polling
+    # memasang handler SIGINT/SIGTERM miliknya sendiri
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    import telegram_bot
+    telegram_bot.preload_analytics()
+
+    with open(heartbeat_file, 'w'):
+        pass
+
+    # EOF berarti supervisor sudah berhenti sebelum worker ini dipakai
+    if sys.stdin.readline().strip() != 'START':
+        return
+
+    # Setelah START, baris STOP atau EOF di stdin menghentikan bot dengan bersih
+    telegram_bot.main(heartbeat_file=heartbeat_file, stop_stream=sys.stdin)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Supervisor for the Telegram bot workers')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('BOT_WORKERS', 2)),
+                        help='Total worker processes (1 active, the rest are warm standbys)')
+    parser.add_argument('--health-timeout', type=int, default=int(os.getenv('BOT_HEALTH_TIMEOUT', 60)),
+                        help='Seconds without a heartbeat before the active worker is restarted')
+    parser.add_argument('--worker', metavar='HEARTBEAT_FILE', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker)
+    else:
+        sys.exit(Supervisor(workers=args.workers, health_timeout=args.health_timeout).run())
+
+
+if __name__ == '__main__':
+    main()
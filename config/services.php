@@ -28,6 +28,13 @@
         'key' => env('RESEND_KEY'),
     ],
 
+    // Supervisor bot Telegram (bot_supervisor.py) memakai env yang sama untuk batas stale PID file
+    'telegram_bot' => [
+        'pid_file' => storage_path('app/bot_supervisor.pid'),
+        'reload_file' => storage_path('app/bot_supervisor.reload'),
+        'stale_after' => (int) env('BOT_SUPERVISOR_STALE_AFTER', 30),
+    ],
+
     'slack' => [
         'notifications' => [
             'bot_user_oauth_token' => env('SLACK_BOT_USER_OAUTH_TOKEN'),
@@ -0,0 +1,258 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from mysql.connector import Error
+
+logger = logging.getLogger('intake_alerts')
+
+# Interval polling tiket baru (detik) dan jumlah tiket maksimum per query
+ALERT_POLL_INTERVAL = 60
+ALERT_BATCH_SIZE = 5000
+
+# Statistik awal diambil dari beberapa hari terakhir, selanjutnya diperbarui per tiket/jam
+ALERT_BOOTSTRAP_DAYS = 28
+HOURLY_WINDOW = 28
+SUPPLIER_WINDOW = 200
+MIN_SAMPLES = 7
+ALERT_Z = 2.5
+
+# Jam dianggap selesai setelah lewat grace ini; jam yang lebih lama dari MAX_LAG tidak dikirim sebagai alert
+HOUR_CLOSE_GRACE = timedelta(minutes=15)
+ALERT_MAX_LAG = timedelta(hours=2)
+
+
+def stats_update(stats, value, window):
+    """
+    Update statistik (n, mean, m2) gaya Welford. n dibatasi window sehingga
+    data lama perlahan kehilangan bobot (rolling).
+    """
+    n, mean, m2 = stats or (0, 0.0, 0.0)
+    if n >= window:
+        m2 *= (window - 1) / window
+        n = window - 1
+    n += 1
+    delta = value - mean
+    mean += delta / n
+    m2 += delta * (value - mean)
+    return n, mean, m2
+
+
+def stats_std(stats):
+    n, mean, m2 = stats
+    return (m2 / n) ** 0.5 if n else 0.0
+
+
+def floor_hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def format_kg(value):
+    return f"{value:,.0f}".replace(',', '.')
+
+
+class IntakeAlertEngine:
+    """
+    Memantau tiket wbticket baru berdasarkan watermark (CRTDT, ID) dan
+    mengirim alert ke chat yang berlangganan:
+    - intake per jam suatu site di bawah threshold (hanya untuk jam yang rata-ratanya
+      di atas threshold) atau jauh di bawah normal
+    - netto satu tiket supplier jauh dari rata-rata supplier tersebut
+
+    Semua state disimpan di bot_data['intake_alerts'] sehingga ikut
+    dipersist bersama state bot lainnya.
+    """
+
+    def __init__(self, get_connection, bot_data):
+        self.get_connection = get_connection
+        self.state = bot_data.setdefault('intake_alerts', {
+            'watermark': None,
+            'subscriptions': {},
+            'hourly_stats': {},
+            'supplier_stats': {},
+            'open_hours': {},
+        })
+
+    def subscribe(self, chat_id, site_id, threshold=None):
+        self.state['subscriptions'].setdefault(site_id, {})[chat_id] = threshold
+
+    def unsubscribe(self, chat_id, site_id=None):
+        for site, chats in self.state['subscriptions'].items():
+            if site_id is None or site == site_id:
+                chats.pop(chat_id, None)
+
+    def _fetch(self, query, params):
+        connection = self.get_connection()
+        if connection is None:
+            raise Error("Failed to connect to the database.")
+        try:
+            with connection.cursor(dictionary=True) as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+        finally:
+            if connection.is_connected():
+                connection.close()
+
+    def fetch_bootstrap_rows(self, now):
+        """
+        Ambil agregat ALERT_BOOTSTRAP_DAYS hari terakhir (per site-jam dan per supplier).
+        Hanya membaca database sehingga aman dijalankan di thread terpisah.
+        """
+        today = floor_hour(now).replace(hour=0)
+        start = today - timedelta(days=ALERT_BOOTSTRAP_DAYS)
+
+        hourly_rows = self._fetch("""
+            SELECT SITE_ID, DATE(CRTDT) AS TANGGAL, HOUR(CRTDT) AS JAM, SUM(BERATBERSIH - GRD_RCUTKGFIX) AS NETTO
+            FROM wbticket
+            WHERE CRTDT >= %s AND CRTDT < %s AND JENISMUATAN = '31000010'
+            GROUP BY SITE_ID, DATE(CRTDT), HOUR(CRTDT)
+        """, (start, today))
+
+        supplier_rows = self._fetch("""
+            SELECT SUPPLIERCODEGROUP, COUNT(*) AS JUMLAH, AVG(BERATBERSIH - GRD_RCUTKGFIX) AS RATA,
+                   STDDEV_POP(BERATBERSIH - GRD_RCUTKGFIX) AS SD
+            FROM wbticket
+            WHERE CRTDT >= %s AND JENISMUATAN = '31000010'
+            GROUP BY SUPPLIERCODEGROUP
+        """, (start,))
+        return hourly_rows, supplier_rows
+
+    def bootstrap(self, now, hourly_rows, supplier_rows):
+        """
+        Isi statistik awal dari hasil fetch_bootstrap_rows. Dijalankan di event loop
+        karena mengubah bot_data yang juga dibaca (deepcopy) oleh persistence.
+        """
+        current_hour = floor_hour(now)
+        start = current_hour.replace(hour=0) - timedelta(days=ALERT_BOOTSTRAP_DAYS)
+
+        hourly = {(row['SITE_ID'], row['TANGGAL'], int(row['JAM'])): float(row['NETTO'] or 0) for row in hourly_rows}
+
+        # Jam tanpa tiket dihitung 0 supaya rata-rata per jam tidak bias ke atas
+        for site_id in {key[0] for key in hourly}:
+            for day in range(ALERT_BOOTSTRAP_DAYS):
+                date = (start + timedelta(days=day)).date()
+                for hour in range(24):
+                    key = (site_id, hour)
+                    value = hourly.get((site_id, date, hour), 0.0)
+                    self.state['hourly_stats'][key] = stats_update(self.state['hourly_stats'].get(key), value, HOURLY_WINDOW)
+            self.state['open_hours'][site_id] = {'hour': current_hour, 'netto': 0.0}
+
+        for row in supplier_rows:
+            n = min(int(row['JUMLAH']), SUPPLIER_WINDOW)
+            sd = float(row['SD'] or 0)
+            self.state['supplier_stats'][row['SUPPLIERCODEGROUP']] = (n, float(row['RATA'] or 0), sd * sd * n)
+
+        # Mulai dari awal jam berjalan agar total jam ini lengkap
+        self.state['watermark'] = (current_hour, 0)
+
+    def fetch_new_tickets(self):
+        crtdt, ticket_id = self.state['watermark']
+        return self._fetch("""
+            SELECT ID, SITE_ID, CRTDT, SUPPLIERCODEGROUP, BERATBERSIH - GRD_RCUTKGFIX AS NETTO
+            FROM wbticket
+            WHERE JENISMUATAN = '31000010' AND (CRTDT > %s OR (CRTDT = %s AND ID > %s))
+            ORDER BY CRTDT, ID
+            LIMIT %s
+        """, (crtdt, crtdt, ticket_id, ALERT_BATCH_SIZE))
+
+    def _close_hours(self, site_id, until, now, alerts):
+        """Tutup semua jam site sebelum `until`; jam tanpa tiket bernilai 0."""
+        open_hour = self.state['open_hours'].get(site_id)
+        if open_hour is None:
+            return
+        hour, netto = open_hour['hour'], open_hour['netto']
+        while hour < until:
+            key = (site_id, hour.hour)
+            stats = self.state['hourly_stats'].get(key)
+            if hour >= now - ALERT_MAX_LAG:
+                alerts.extend(self._check_hour(site_id, hour, netto, stats))
+            self.state['hourly_stats'][key] = stats_update(stats, netto, HOURLY_WINDOW)
+            hour += timedelta(hours=1)
+            netto = 0.0
+        self.state['open_hours'][site_id] = {'hour': hour, 'netto': netto}
+
+    def _check_hour(self, site_id, hour, netto, stats):
+        alerts = []
+        label = f"{hour:%Y-%m-%d %H}:00"
+        for chat_id, threshold in self.state['subscriptions'].get(site_id, {}).items():
+            if threshold is not None:
+                # Hanya jam yang biasanya di atas batas (mis. bukan malam hari atau hari libur)
+                if stats and stats[0] >= MIN_SAMPLES and stats[1] > threshold and netto < threshold:
+                    alerts.append((chat_id, f"⚠️ Intake {site_id} jam {label}: {format_kg(netto)} kg, "
+                                            f"di bawah batas {format_kg(threshold)} kg"))
+            elif stats and stats[0] >= MIN_SAMPLES:
+                mean = stats[1]
+                std = max(stats_std(stats), 0.1 * mean)
+                if mean > 0 and netto < mean - ALERT_Z * std:
+                    alerts.append((chat_id, f"⚠️ Intake {site_id} jam {label}: {format_kg(netto)} kg, "
+                                            f"jauh di bawah normal ({format_kg(mean)} kg)"))
+        return alerts
+
+    def _check_ticket(self, row, now, alerts):
+        supplier = row['SUPPLIERCODEGROUP']
+        netto = float(row['NETTO'] or 0)
+        stats = self.state['supplier_stats'].get(supplier)
+        # Saat mengejar watermark lama (mis. setelah restart) tiket lama hanya memperbarui statistik
+        if stats and stats[0] >= MIN_SAMPLES and row['CRTDT'] >= now - ALERT_MAX_LAG:
+            mean = stats[1]
+            std = max(stats_std(stats), 0.05 * abs(mean))
+            if std > 0 and abs(netto - mean) > ALERT_Z * std:
+                for chat_id in self.state['subscriptions'].get(row['SITE_ID'], {}):
+                    alerts.append((chat_id, f"⚠️ Netto tidak wajar di {row['SITE_ID']}: supplier {supplier} "
+                                            f"{format_kg(netto)} kg (rata-rata {format_kg(mean)} kg), tiket {row['ID']}"))
+        self.state['supplier_stats'][supplier] = stats_update(stats, netto, SUPPLIER_WINDOW)
+
+    def process(self, rows, now):
+        """Proses tiket baru (terurut CRTDT, ID). Mengembalikan daftar (chat_id, teks) alert."""
+        alerts = []
+        for row in rows:
+            site_id = row['SITE_ID']
+            ticket_hour = floor_hour(row['CRTDT'])
+            open_hour = self.state['open_hours'].setdefault(site_id, {'hour': ticket_hour, 'netto': 0.0})
+
+            if ticket_hour > open_hour['hour']:
+                self._close_hours(site_id, ticket_hour, now, alerts)
+            # Tiket terlambat untuk jam yang sudah ditutup hanya dipakai untuk statistik supplier
+            if ticket_hour == self.state['open_hours'][site_id]['hour']:
+                self.state['open_hours'][site_id]['netto'] += float(row['NETTO'] or 0)
+
+            self._check_ticket(row, now, alerts)
+            self.state['watermark'] = (row['CRTDT'], row['ID'])
+        return alerts
+
+    def close_elapsed_hours(self, now):
+        """Tutup jam yang sudah lewat grace untuk semua site, termasuk yang tidak punya tiket baru."""
+        alerts = []
+        closable = floor_hour(now - HOUR_CLOSE_GRACE)
+        for site_id in list(self.state['open_hours']):
+            self._close_hours(site_id, closable, now, alerts)
+        return alerts
+
+    async def poll_once(self):
+        now = datetime.now()
+        if self.state['watermark'] is None:
+            hourly_rows, supplier_rows = await asyncio.to_thread(self.fetch_bootstrap_rows, now)
+            self.bootstrap(now, hourly_rows, supplier_rows)
+
+        alerts = []
+        while True:
+            rows = await asyncio.to_thread(self.fetch_new_tickets)
+            alerts.extend(self.process(rows, now))
+            if len(rows) < ALERT_BATCH_SIZE:
+                break
+        alerts.extend(self.close_elapsed_hours(now))
+        return alerts
+
+    async def run(self, bot):
+        while True:
+            try:
+                alerts = await self.poll_once()
+            except Exception as e:
+                logger.error(f"Error polling intake alerts: {e}")
+                alerts = []
+            # Satu chat yang gagal (mis. bot diblokir) tidak boleh membuang alert untuk chat lain
+            for chat_id, text in alerts:
+                try:
+                    await bot.send_message(chat_id=chat_id, text=text)
+                except Exception as e:
+                    logger.error(f"Error sending intake alert to {chat_id}: {e}")
+            await asyncio.sleep(ALERT_POLL_INTERVAL)
@@ -0,0 +1,408 @@
+import os
+import json
+import queue
+import random
+import asyncio
+import logging
+import argparse
+import threading
+from time import time, sleep
+from types import SimpleNamespace
+from datetime import datetime, timedelta
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Bot dijalankan dengan token palsu dan tanpa persistence agar tidak menyentuh state produksi
+os.environ['TELEGRAM_API_KEY'] = '123456:LOADTEST'
+os.environ['BOT_PERSISTENCE'] = 'none'
+os.environ['INTAKE_ALERTS'] = 'off'
+
+# Load test hanya boleh berjalan terhadap database khusus yang disebut eksplisit lewat
+# LOAD_TEST_MYSQL_*; tanpa itu (atau jika sama dengan MYSQL_* bot) script berhenti supaya
+# query beban tinggi dan tiket sintetis tidak pernah menyentuh database dari .env
+LOAD_TEST_DATABASE = os.getenv('LOAD_TEST_MYSQL_DATABASE')
+LOAD_TEST_HOST = os.getenv('LOAD_TEST_MYSQL_HOST', os.getenv('MYSQL_HOST'))
+if not LOAD_TEST_DATABASE:
+    raise SystemExit("Set LOAD_TEST_MYSQL_DATABASE (and optionally LOAD_TEST_MYSQL_HOST/USER/PASSWORD) "
+                     "to a dedicated database before running the load test.")
+if (LOAD_TEST_HOST, LOAD_TEST_DATABASE) == (os.getenv('MYSQL_HOST'), os.getenv('MYSQL_DATABASE')):
+    raise SystemExit("LOAD_TEST_MYSQL_DATABASE must not be the bot's own MYSQL_DATABASE")
+os.environ['MYSQL_HOST'] = LOAD_TEST_HOST or ''
+os.environ['MYSQL_USER'] = os.getenv('LOAD_TEST_MYSQL_USER', os.getenv('MYSQL_USER', ''))
+os.environ['MYSQL_PASSWORD'] = os.getenv('LOAD_TEST_MYSQL_PASSWORD', os.getenv('MYSQL_PASSWORD', ''))
+os.environ['MYSQL_DATABASE'] = LOAD_TEST_DATABASE
+
+# Tabel dimensi site/supplier dibaca dari database load test yang sama dengan wbticket;
+# engine PKS juga diarahkan ke sana agar tidak ada koneksi ke server produksi
+LOAD_TEST_DATABASE_URL = 'mysql+pymysql://{}:{}@{}/{}'.format(
+    os.environ['MYSQL_USER'], os.environ['MYSQL_PASSWORD'], os.environ['MYSQL_HOST'], LOAD_TEST_DATABASE)
+os.environ['PTPN_DATABASE_URL'] = LOAD_TEST_DATABASE_URL
+os.environ['PKS_DATABASE_URL'] = LOAD_TEST_DATABASE_URL
+
+import telegram_bot
+
+# Set up logging
+logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+logger = logging.getLogger('load_test')
+
+# Site sintetis yang di-seed; tidak bertabrakan dengan SITE_ID produksi (7Fxx)
+LOAD_TEST_SITE_PREFIX = 'LT'
+SEED_BATCH_SIZE = 1000
+
+
+class MockBotApi:
+    """
+    Pengganti Bot API Telegram di memori: menyimpan antrian update untuk
+    getUpdates dan meneruskan balasan bot (sendMessage/sendPhoto/...) ke
+    user virtual yang menunggu di chat_id-nya.
+    """
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.updates = []
+        self.next_update_id = 1
+        self.next_message_id = 1
+        self.replies = {}
+
+    def register_chat(self, chat_id):
+        self.replies[chat_id] = queue.Queue()
+        return self.replies[chat_id]
+
+    def push_update(self, chat_id, text):
+        message = {
+            'message_id': self.next_message_id,
+            'date': int(time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': {'id': chat_id, 'is_bot': False, 'first_name': f'user{chat_id}'},
+            'text': text,
+        }
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+        with self.cond:
+            self.updates.append({'update_id': self.next_update_id, 'message': message})
+            self.next_update_id += 1
+            self.next_message_id += 1
+            self.cond.notify_all()
+
+    def get_updates(self, offset, timeout):
+        with self.cond:
+            self.updates = [update for update in self.updates if update['update_id'] >= offset]
+            self.cond.wait_for(lambda: self.updates, timeout=timeout)
+            return list(self.updates)
+
+    def reply(self, method, params):
+        chat_id = int(params.get('chat_id', 0))
+        with self.cond:
+            message_id = self.next_message_id
+            self.next_message_id += 1
+        message = {'message_id': message_id, 'date': int(time()), 'chat': {'id': chat_id, 'type': 'private'}}
+        if method == 'sendPhoto':
+            message['photo'] = [{'file_id': f'photo{message_id}', 'file_unique_id': f'photo{message_id}', 'width': 1600, 'height': 800}]
+        elif method == 'sendDocument':
+            message['document'] = {'file_id': f'doc{message_id}', 'file_unique_id': f'doc{message_id}'}
+        else:
+            message['text'] = str(params.get('text', ''))
+
+        if chat_id in self.replies:
+            self.replies[chat_id].put((method, message.get('text', ''), time()))
+        return message
+
+    def handle(self, method, params):
+        if method == 'getMe':
+            return {'id': 1, 'is_bot': True, 'first_name': 'LoadTestBot', 'username': 'load_test_bot'}
+        if method == 'getUpdates':
+            return self.get_updates(int(params.get('offset', 0)), float(params.get('timeout', 0)))
+        if method in ('sendMessage', 'sendPhoto', 'sendDocument'):
+            return self.reply(method, params)
+        return True
+
+
+def parse_request_params(content_type, body):
+    """Baca parameter Bot API dari body JSON, form-urlencoded atau multipart."""
+    if not body:
+        return {}
+    if content_type.startswith('application/json'):
+        return json.loads(body)
+
+    raw = {}
+    if content_type.startswith('multipart/form-data'):
+        message = BytesParser(policy=default_policy).parsebytes(
+            b'Content-Type: ' + content_type.encode() + b'\r\n\r\n' + body)
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            if part.get_filename() is None:
+                raw[name] = part.get_content()
+    else:
+        raw = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+
+    params = {}
+    for key, value in raw.items():
+        try:
+            params[key] = json.loads(value)
+        except (TypeError, ValueError):
+            params[key] = value
+    return params
+
+
+def start_mock_server(api, port=0):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            method = self.path.rsplit('/', 1)[-1]
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            result = api.handle(method, parse_request_params(self.headers.get('Content-Type', ''), body))
+            payload = json.dumps({'ok': True, 'result': result}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class StubGeminiModel:
+    """Pengganti model Gemini dengan latensi tetap agar free-text bisa diuji tanpa API eksternal."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def start_chat(self, history):
+        model = self
+
+        class Chat:
+            def __init__(self):
+                self.history = [SimpleNamespace(role=item['role'], parts=[SimpleNamespace(text=p) for p in item['parts']])
+                                for item in history]
+
+            def send_message(self, question):
+                sleep(model.latency)
+                answer = f"Jawaban untuk: {question}"
+                self.history.append(SimpleNamespace(role='user', parts=[SimpleNamespace(text=question)]))
+                self.history.append(SimpleNamespace(role='model', parts=[SimpleNamespace(text=answer)]))
+                return SimpleNamespace(text=answer)
+
+        return Chat()
+
+
+def seed_database(tickets, sites, days):
+    """Buat tabel (jika belum ada) dan isi tiket sintetis untuk site LTxx."""
+    connection = telegram_bot.get_db_connection()
+    if connection is None:
+        raise RuntimeError("Failed to connect to the database.")
+
+    site_ids = [f'{LOAD_TEST_SITE_PREFIX}{i:02d}' for i in range(1, sites + 1)]
+    supplier_groups = [f'2500{i:04d}' for i in range(1, 11)] + ['25001059']
+    now = datetime.now()
+
+    try:
+        cursor = connection.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS wbticket (
+                ID BIGINT AUTO_INCREMENT PRIMARY KEY,
+                SITE_ID VARCHAR(10), POSTINGDT DATETIME, CRTDT DATETIME, TGLMASUK DATETIME,
+                SUPPLIERCODE VARCHAR(20), SUPPLIERCODEGROUP VARCHAR(20), JENISMUATAN VARCHAR(20),
+                STORAGE VARCHAR(20), BERATBERSIH INT, GRD_RCUTKGFIX INT,
+                INDEX idx_site_posting (SITE_ID, POSTINGDT), INDEX idx_crtdt (CRTDT)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ticket (
+                SITE_ID VARCHAR(10), site_name VARCHAR(100), SUPPLIERCODEGROUP VARCHAR(20), SUPPLIERNAME VARCHAR(100),
+                INDEX idx_site (SITE_ID)
+            )
+        """)
+
+        # Seed ulang menggantikan data LTxx sebelumnya, bukan menumpuknya
+        cursor.execute("DELETE FROM wbticket WHERE SITE_ID LIKE %s", (LOAD_TEST_SITE_PREFIX + '%',))
+        cursor.execute("DELETE FROM ticket WHERE SITE_ID LIKE %s", (LOAD_TEST_SITE_PREFIX + '%',))
+        cursor.executemany(
+            "INSERT INTO ticket (SITE_ID, site_name, SUPPLIERCODEGROUP, SUPPLIERNAME) VALUES (%s, %s, %s, %s)",
+            [(site_id, f'PB. LOAD TEST {site_id}', group, f'SUPPLIER {group}') for site_id in site_ids for group in supplier_groups]
+        )
+
+        batch = []
+        for _ in range(tickets):
+            created = now - timedelta(seconds=random.randint(0, days * 24 * 60 * 60))
+            group = random.choice(supplier_groups)
+            batch.append((
+                random.choice(site_ids), created.replace(hour=0, minute=0, second=0, microsecond=0), created, created,
+                group, group, '31000010', f'GD{random.randint(1, 3)}', random.randint(2000, 12000), random.randint(0, 300)
+            ))
+            if len(batch) == SEED_BATCH_SIZE:
+                cursor.executemany(
+                    "INSERT INTO wbticket (SITE_ID, POSTINGDT, CRTDT, TGLMASUK, SUPPLIERCODE, SUPPLIERCODEGROUP,"
+                    " JENISMUATAN, STORAGE, BERATBERSIH, GRD_RCUTKGFIX) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                    batch
+                )
+                batch = []
+        if batch:
+            cursor.executemany(
+                "INSERT INTO wbticket (SITE_ID, POSTINGDT, CRTDT, TGLMASUK, SUPPLIERCODE, SUPPLIERCODEGROUP,"
+                " JENISMUATAN, STORAGE, BERATBERSIH, GRD_RCUTKGFIX) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                batch
+            )
+        connection.commit()
+        cursor.close()
+    finally:
+        if connection.is_connected():
+            connection.close()
+
+    logger.info(f"Seeded {tickets} synthetic tickets for {len(site_ids)} sites")
+    return site_ids
+
+
+def make_request(scenario, site_ids, days):
+    """Buat teks perintah dan jenis balasan yang diharapkan untuk satu skenario."""
+    site_id = random.choice(site_ids)
+    day = datetime.now() - timedelta(days=random.randint(0, days - 1))
+
+    if scenario == 'detail':
+        return f"/detail {site_id} {day:%Y-%m-%d}", 'sendMessage'
+    if scenario == 'chart':
+        command = random.choice([
+            f"/daily_net_weight {day:%Y-%m-%d} {site_id}",
+            f"/monthly_net_weight {day:%Y-%m} {site_id}",
+            f"/yearly_net_weight {day:%Y} {site_id}",
+            f"/range_net_weight {day:%Y-%m-%d} {datetime.now():%Y-%m-%d} {site_id}",
+        ])
+        return command, 'sendPhoto'
+    return random.choice(["Apa itu kelapa sawit?", "Bagaimana cara menghitung netto?", "Halo bot"]), 'sendMessage'
+
+
+def virtual_user(api, chat_id, mix, site_ids, days, think_time, timeout, deadline, results):
+    replies = api.register_chat(chat_id)
+    scenarios, weights = zip(*mix.items())
+
+    while time() < deadline:
+        scenario = random.choices(scenarios, weights=weights)[0]
+        text, expected = make_request(scenario, site_ids, days)
+
+        # Buang balasan tambahan dari request sebelumnya (mis. /detail yang dipecah beberapa
+        # pesan, atau balasan yang datang setelah timeout) agar tidak dihitung untuk request ini
+        while not replies.empty():
+            replies.get_nowait()
+        sent_at = time()
+        api.push_update(chat_id, text)
+
+        try:
+            while True:
+                method, reply_text, received_at = replies.get(timeout=max(0.0, sent_at + timeout - time()))
+                if received_at >= sent_at:
+                    break
+            ok = method == expected and not reply_text.startswith(('Error', 'Failed', telegram_bot.TIMEOUT_MESSAGE))
+            results.append((scenario, ok, received_at - sent_at))
+        except queue.Empty:
+            results.append((scenario, False, timeout))
+
+        sleep(think_time)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def report(results, duration):
+    lines = [f"{'scenario':<10}{'requests':>10}{'errors':>8}{'err %':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>8}"]
+    groups = sorted({scenario for scenario, _, _ in results}) + ['total']
+    for group in groups:
+        rows = [r for r in results if group == 'total' or r[0] == group]
+        latencies = [latency * 1000 for _, ok, latency in rows if ok]
+        errors = sum(1 for _, ok, _ in rows if not ok)
+        lines.append(
+            f"{group:<10}{len(rows):>10}{errors:>8}{errors / max(len(rows), 1) * 100:>8.1f}"
+            f"{percentile(latencies, 50):>10.0f}{percentile(latencies, 95):>10.0f}{percentile(latencies, 99):>10.0f}"
+            f"{len(latencies) / duration:>8.2f}"
+        )
+    return "\n".join(lines)
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        name, weight = item.split('=')
+        if name not in ('detail', 'chart', 'text'):
+            raise argparse.ArgumentTypeError(f"Unknown scenario '{name}', use detail, chart or text")
+        mix[name] = float(weight)
+    return mix
+
+
+async def run_load_test(args):
+    telegram_bot.model = StubGeminiModel(args.gemini_latency)
+
+    if args.seed_tickets:
+        site_ids = seed_database(args.seed_tickets, args.sites, args.days)
+    else:
+        site_ids = [f'{LOAD_TEST_SITE_PREFIX}{i:02d}' for i in range(1, args.sites + 1)]
+
+    api = MockBotApi()
+    server = start_mock_server(api, args.port)
+    base_url = f'http://127.0.0.1:{server.server_address[1]}/bot'
+
+    application = telegram_bot.build_application(base_url=base_url)
+    results = []
+    async with application:
+        await application.start()
+        await application.updater.start_polling(poll_interval=0, timeout=5)
+
+        started_at = time()
+        deadline = started_at + args.duration
+        users = [
+            threading.Thread(
+                target=virtual_user,
+                args=(api, 10000 + i, args.mix, site_ids, args.days, args.think_time, args.timeout, deadline, results),
+                daemon=True,
+            )
+            for i in range(args.users)
+        ]
+        for user in users:
+            user.start()
+        for user in users:
+            await asyncio.to_thread(user.join)
+        duration = time() - started_at
+
+        await application.updater.stop()
+        await application.stop()
+
+    server.shutdown()
+    return report(results, duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the Telegram bot against a local mock Bot API')
+    parser.add_argument('--users', type=int, default=10, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=60, help='Test duration in seconds')
+    parser.add_argument('--think-time', type=float, default=1.0, help='Pause between requests per user (s)')
+    parser.add_argument('--timeout', type=float, default=30, help='Seconds before a request counts as failed')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('detail=4,chart=3,text=3'),
+                        help='Scenario weights, e.g. detail=4,chart=3,text=3')
+    parser.add_argument('--seed-tickets', type=int, default=0, help='Insert this many synthetic tickets before the run')
+    parser.add_argument('--sites', type=int, default=5, help='Number of synthetic LTxx sites')
+    parser.add_argument('--days', type=int, default=90, help='Days of history covered by seeded tickets and requests')
+    parser.add_argument('--gemini-latency', type=float, default=0.5, help='Simulated Gemini response time (s)')
+    parser.add_argument('--port', type=int, default=0, help='Port for the mock Bot API (0 = random)')
+    args = parser.parse_args()
+
+    print(asyncio.run(run_load_test(args)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import pandas as pd
+from datetime import timedelta
+
+# Pilihan granularitas diagram /range_net_weight, dari yang paling rinci:
+# (nama, ekspresi bucket SQL, frekuensi pandas, format label sumbu x)
+RANGE_BUCKETS = [
+    ('Jam', "DATE_FORMAT(CRTDT, '%Y-%m-%d %H:00:00')", 'h', '%d-%m %H:00'),
+    ('Hari', "DATE(CRTDT)", 'D', '%d-%m-%Y'),
+    ('Minggu', "DATE_SUB(DATE(CRTDT), INTERVAL WEEKDAY(CRTDT) DAY)", 'W-MON', '%d-%m-%Y'),
+    ('Bulan', "DATE_FORMAT(CRTDT, '%Y-%m-01')", 'MS', '%b %Y'),
+]
+MAX_RANGE_BUCKETS = 60
+
+
+# Langkah tetap per frekuensi; 'MS' dihitung dari selisih bulan
+BUCKET_STEPS = {'h': timedelta(hours=1), 'D': timedelta(days=1), 'W-MON': timedelta(weeks=1)}
+
+
+# Geser start ke awal bucket pertama (Senin untuk mingguan, tanggal 1 untuk bulanan)
+def align_bucket_start(start, freq):
+    if freq == 'W-MON':
+        return start - timedelta(days=start.weekday())
+    if freq == 'MS':
+        return start.replace(day=1)
+    return start
+
+
+# Hitung jumlah bucket secara aritmetika, tanpa membuat index (rentang ribuan tahun tetap murah)
+def range_bucket_count(start, end, freq):
+    start = align_bucket_start(start, freq)
+    if end < start:
+        return 0
+    if freq == 'MS':
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    return (end - start) // BUCKET_STEPS[freq] + 1
+
+
+# Buat daftar awal bucket dari start sampai end untuk frekuensi tertentu
+def range_bucket_index(start, end, freq):
+    return pd.date_range(align_bucket_start(start, freq), end, freq=freq)
+
+
+# Pilih granularitas paling rinci yang jumlah bucket-nya tidak melebihi MAX_RANGE_BUCKETS;
+# index hanya dibuat untuk granularitas yang terpilih
+def pick_range_bucket(start, end):
+    for bucket in RANGE_BUCKETS:
+        if range_bucket_count(start, end, bucket[2]) <= MAX_RANGE_BUCKETS:
+            return bucket, range_bucket_index(start, end, bucket[2])
+    return None, None
+
+
+# Isi bucket yang kosong dengan 0 memakai reindex, mengembalikan Series netto per PERIODE
+def fill_range_buckets(data, index):
+    periods = pd.to_datetime(data['PERIODE'])
+    return pd.Series(data['NETTO'].astype(float).values, index=periods).reindex(index, fill_value=0).fillna(0)
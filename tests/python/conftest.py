@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modul bot berada di root repository, bukan di dalam package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
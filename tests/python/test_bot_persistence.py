@@ -0,0 +1,47 @@
+import asyncio
+
+from bot_persistence import SQLitePersistence, cache_get, cache_set
+
+
+def test_sqlite_persistence_round_trip(tmp_path):
+    filepath = str(tmp_path / 'state.sqlite')
+
+    async def write():
+        persistence = SQLitePersistence(filepath=filepath)
+        await persistence.update_bot_data({'chart_file_ids': {('daily', '2024-07-01', '7F01'): (1.0, ('abc', 'Total'))}})
+        await persistence.update_chat_data(42, {'gemini_history': [{'role': 'user', 'parts': ['halo']}]})
+        await persistence.update_user_data(7, {'lang': 'id'})
+        await persistence.update_conversation('detail', (42, 7), 1)
+        await persistence.update_chat_data(43, {'x': 1})
+        await persistence.drop_chat_data(43)
+        # Tanpa flush: simulasi proses yang dimatikan paksa
+
+    async def read():
+        persistence = SQLitePersistence(filepath=filepath)
+        result = (
+            await persistence.get_bot_data(),
+            await persistence.get_chat_data(),
+            await persistence.get_user_data(),
+            await persistence.get_conversations('detail'),
+        )
+        await persistence.flush()
+        return result
+
+    asyncio.run(write())
+    bot_data, chat_data, user_data, conversations = asyncio.run(read())
+
+    assert bot_data == {'chart_file_ids': {('daily', '2024-07-01', '7F01'): (1.0, ('abc', 'Total'))}}
+    assert chat_data == {42: {'gemini_history': [{'role': 'user', 'parts': ['halo']}]}}
+    assert user_data == {7: {'lang': 'id'}}
+    assert conversations == {(42, 7): 1}
+
+
+def test_cache_evicts_oldest_entry(monkeypatch):
+    monkeypatch.setattr('bot_persistence.MAX_CACHE_ENTRIES', 2)
+    bot_data = {}
+    for key in ('a', 'b', 'c'):
+        cache_set(bot_data, 'detail_result', key, key.upper())
+
+    assert cache_get(bot_data, 'detail_result', 'a') is None
+    assert cache_get(bot_data, 'detail_result', 'c') == 'C'
+    assert cache_get(bot_data, 'detail_result', 'c', max_age=-1) is None
@@ -0,0 +1,104 @@
+from datetime import datetime
+
+import pytest
+
+from intake_alerts import HOURLY_WINDOW, MIN_SAMPLES, SUPPLIER_WINDOW, IntakeAlertEngine, stats_std, stats_update
+
+
+def make_engine():
+    def no_database():
+        raise AssertionError("database should not be used")
+
+    return IntakeAlertEngine(no_database, {})
+
+
+def ticket(ticket_id, site_id, crtdt, netto, supplier='25000001'):
+    return {'ID': ticket_id, 'SITE_ID': site_id, 'CRTDT': crtdt, 'SUPPLIERCODEGROUP': supplier, 'NETTO': netto}
+
+
+def test_stats_update_matches_population_mean_and_std():
+    values = [10.0, 12.0, 14.0, 18.0]
+    stats = None
+    for value in values:
+        stats = stats_update(stats, value, window=10)
+
+    n, mean, _ = stats
+    assert n == 4
+    assert mean == pytest.approx(13.5)
+    assert stats_std(stats) == pytest.approx(2.958, abs=1e-3)
+
+
+def test_stats_update_caps_samples_at_window():
+    stats = None
+    for _ in range(20):
+        stats = stats_update(stats, 100.0, window=5)
+    assert stats[0] == 5
+    assert stats[1] == pytest.approx(100.0)
+
+    # Nilai baru mendapat bobot 1/window setelah window penuh
+    stats = stats_update(stats, 0.0, window=5)
+    assert stats[1] == pytest.approx(80.0)
+
+
+def test_stats_std_of_empty_stats_is_zero():
+    assert stats_std((0, 0.0, 0.0)) == 0.0
+
+
+def test_close_hours_fills_hours_without_tickets_with_zero():
+    engine = make_engine()
+    engine.state['open_hours']['LT01'] = {'hour': datetime(2024, 7, 1, 8), 'netto': 5000.0}
+
+    alerts = []
+    engine._close_hours('LT01', datetime(2024, 7, 1, 11), datetime(2024, 7, 1, 11, 20), alerts)
+
+    assert engine.state['hourly_stats'][('LT01', 8)] == (1, 5000.0, 0.0)
+    assert engine.state['hourly_stats'][('LT01', 9)] == (1, 0.0, 0.0)
+    assert engine.state['hourly_stats'][('LT01', 10)] == (1, 0.0, 0.0)
+    assert ('LT01', 11) not in engine.state['hourly_stats']
+    assert engine.state['open_hours']['LT01'] == {'hour': datetime(2024, 7, 1, 11), 'netto': 0.0}
+    assert alerts == []
+
+
+def test_process_advances_watermark_and_accumulates_open_hour():
+    engine = make_engine()
+    rows = [
+        ticket(1, 'LT01', datetime(2024, 7, 1, 8, 5), 4000),
+        ticket(2, 'LT01', datetime(2024, 7, 1, 8, 40), 6000),
+        ticket(3, 'LT01', datetime(2024, 7, 1, 9, 10), 3000),
+    ]
+
+    engine.process(rows, now=datetime(2024, 7, 1, 9, 30))
+
+    assert engine.state['watermark'] == (datetime(2024, 7, 1, 9, 10), 3)
+    assert engine.state['hourly_stats'][('LT01', 8)] == (1, 10000.0, 0.0)
+    assert engine.state['open_hours']['LT01'] == {'hour': datetime(2024, 7, 1, 9), 'netto': 3000.0}
+
+
+def test_process_skips_supplier_alerts_for_old_tickets_but_updates_stats():
+    engine = make_engine()
+    engine.subscribe(100, 'LT01')
+    stats = None
+    for netto in [5000.0, 5100.0, 4900.0] * MIN_SAMPLES:
+        stats = stats_update(stats, netto, SUPPLIER_WINDOW)
+    engine.state['supplier_stats']['25000001'] = stats
+    now = datetime(2024, 7, 2, 12, 0)
+
+    old_alerts = engine.process([ticket(1, 'LT01', datetime(2024, 7, 1, 8, 0), 20000)], now)
+    assert old_alerts == []
+    assert engine.state['supplier_stats']['25000001'][0] == stats[0] + 1
+
+    engine.state['supplier_stats']['25000001'] = stats
+    recent_alerts = engine.process([ticket(2, 'LT01', datetime(2024, 7, 2, 11, 50), 20000)], now)
+    assert [chat_id for chat_id, _ in recent_alerts] == [100]
+
+
+def test_threshold_alert_skips_hours_that_are_normally_below_threshold():
+    engine = make_engine()
+    engine.subscribe(100, 'LT01', threshold=5000)
+    busy, night = None, None
+    for _ in range(MIN_SAMPLES):
+        busy = stats_update(busy, 20000.0, HOURLY_WINDOW)
+        night = stats_update(night, 0.0, HOURLY_WINDOW)
+
+    assert engine._check_hour('LT01', datetime(2024, 7, 1, 2), 0.0, night) == []
+    assert len(engine._check_hour('LT01', datetime(2024, 7, 1, 10), 1000.0, busy)) == 1
@@ -0,0 +1,79 @@
+from datetime import datetime
+from time import monotonic
+
+import pandas as pd
+
+from range_buckets import (MAX_RANGE_BUCKETS, RANGE_BUCKETS, fill_range_buckets, pick_range_bucket,
+                           range_bucket_count, range_bucket_index)
+
+
+def test_bucket_sql_uses_single_percent():
+    # mysql.connector tidak mengubah %% menjadi % jika parameter berupa tuple
+    for _, bucket_sql, _, _ in RANGE_BUCKETS:
+        assert '%%' not in bucket_sql
+
+
+def test_pick_hour_bucket_for_two_days():
+    bucket, index = pick_range_bucket(datetime(2024, 7, 1), datetime(2024, 7, 2, 23, 59, 59))
+    assert bucket[0] == 'Jam'
+    assert len(index) == 48
+    assert index[-1] == pd.Timestamp(2024, 7, 2, 23)
+
+
+def test_pick_day_bucket_for_one_month():
+    bucket, index = pick_range_bucket(datetime(2024, 7, 1), datetime(2024, 7, 31, 23, 59, 59))
+    assert bucket[0] == 'Hari'
+    assert len(index) == 31
+
+
+def test_pick_week_bucket_starts_on_monday():
+    bucket, index = pick_range_bucket(datetime(2024, 1, 3), datetime(2024, 6, 30, 23, 59, 59))
+    assert bucket[0] == 'Minggu'
+    assert index[0] == pd.Timestamp(2024, 1, 1)
+    assert all(period.weekday() == 0 for period in index)
+
+
+def test_pick_month_bucket_for_multi_year_range():
+    bucket, index = pick_range_bucket(datetime(2021, 3, 15), datetime(2024, 2, 10, 23, 59, 59))
+    assert bucket[0] == 'Bulan'
+    assert index[0] == pd.Timestamp(2021, 3, 1)
+    assert len(index) == 36
+
+
+def test_pick_rejects_range_longer_than_max_months():
+    bucket, index = pick_range_bucket(datetime(2010, 1, 1), datetime(2024, 12, 31, 23, 59, 59))
+    assert bucket is None and index is None
+
+
+def test_pick_rejects_huge_range_without_building_indexes():
+    started = monotonic()
+    bucket, index = pick_range_bucket(datetime(1, 1, 1), datetime(9999, 12, 31, 23, 59, 59))
+    assert bucket is None and index is None
+    assert monotonic() - started < 0.5
+
+
+def test_range_bucket_count_matches_index_length():
+    cases = [
+        (datetime(2024, 7, 1), datetime(2024, 7, 2, 23, 59, 59)),
+        (datetime(2024, 2, 1), datetime(2024, 3, 31, 23, 59, 59)),
+        (datetime(2024, 1, 3), datetime(2024, 6, 30, 23, 59, 59)),
+        (datetime(2021, 3, 15), datetime(2024, 2, 10, 23, 59, 59)),
+    ]
+    for start, end in cases:
+        for _, _, freq, _ in RANGE_BUCKETS:
+            assert range_bucket_count(start, end, freq) == len(range_bucket_index(start, end, freq))
+
+
+def test_every_picked_index_fits_the_limit():
+    assert len(range_bucket_index(datetime(2024, 1, 1), datetime(2024, 12, 31), 'MS')) <= MAX_RANGE_BUCKETS
+
+
+def test_fill_range_buckets_reindexes_gaps_with_zero():
+    index = range_bucket_index(datetime(2024, 7, 1), datetime(2024, 7, 5, 23, 59, 59), 'D')
+    data = pd.DataFrame({'PERIODE': ['2024-07-02', '2024-07-04'], 'NETTO': [1500, None]})
+
+    series = fill_range_buckets(data, index)
+
+    assert list(series.index) == list(index)
+    assert list(series.values) == [0.0, 1500.0, 0.0, 0.0, 0.0]
+    assert series.sum() == 1500.0